@@ -1,20 +1,80 @@
 """ Main script for grading assignments """
 
-from classroom_notifier import notify_classroom
-from moodle_notifier import update_moodle  # Now we call update_moodle with test_result_collection
+import os
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from classroom_notifier import build_classroom_payload, fetch_check_run_id
+from moodle_notifier import build_moodle_payload, fetch_collaborators
+from outbox import enqueue, flush_outbox
 from pylint_runner import run_pylint
 from pytest_runner import run_pytest
+from similarity import run_similarity
+from utils import bcolors
 
 DEBUG = False
 
 
 def main():
-    # Collect results
-    test_result_collection = collect_results()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Start the network lookups of the notifiers, they overlap with grading
+        collaborators_lookup = executor.submit(fetch_collaborators, os.environ['REPO'])
+        check_run_lookup = executor.submit(lookup_check_run_id)
+
+        # Collect results
+        test_result_collection = collect_results()
+
+        # Compare the submission with the others, using the fingerprints collected by pylint
+        check_similarity(test_result_collection)
+
+        collaborators = lookup_result(collaborators_lookup, 'collaborators')
+        check_run_id = lookup_result(check_run_lookup, 'check run')
+
+    # Write the notifications for Moodle and classroom to the outbox
+    enqueue('moodle', build_moodle_payload(test_result_collection, collaborators))
+    classroom_payload = build_classroom_payload(test_result_collection, check_run_id)
+    if classroom_payload is not None:
+        enqueue('classroom', classroom_payload)
+
+    # Deliver them at the end of the job, unless a separate sender flushes the outbox
+    if os.getenv('OUTBOX_FLUSH', 'true').lower() != 'false':
+        failed = flush_outbox()
+        if 'moodle' in failed:
+            sys.exit(1)
+
+
+def check_similarity(test_result_collection: list):
+    """
+    Attach the similar submissions to the linting results.
+    A failure is reported and never blocks the grade.
+    """
+    try:
+        pairs = run_similarity(test_result_collection)
+    except Exception as e:  # the similarity check must never fail the grading
+        print(f'{bcolors.WARNING}Similarity check failed: {e}{bcolors.ENDC}')
+        return
+
+    for test_result in test_result_collection:
+        if 'fingerprints' in test_result:
+            test_result['similarity'] = pairs
+
+
+def lookup_check_run_id() -> int:
+    """Look up the check run of the current workflow run"""
+    owner, repo = os.getenv('GITHUB_REPOSITORY', '/').split('/')
+    return fetch_check_run_id(owner, repo, int(os.getenv('GITHUB_RUN_ID', '')))
+
 
-    # Update Moodle and notify classroom using the test_result_collection
-    update_moodle(test_result_collection)
-    notify_classroom(test_result_collection)
+def lookup_result(lookup: Future, name: str):
+    """
+    Return the result of a background lookup.
+    A failed lookup is reported and returns None, the notifier then looks it up again when sending.
+    """
+    try:
+        return lookup.result()
+    except Exception as e:  # the lookup must never fail the grading
+        print(f'{bcolors.WARNING}Prefetching {name} failed, retrying on upload: {e}{bcolors.ENDC}')
+        return None
 
 
 def collect_results() -> list:
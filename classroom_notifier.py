@@ -1,8 +1,9 @@
 import json
 import os
-import subprocess
 
-from utils import bcolors
+import requests
+
+from utils import bcolors, github_api_url, github_headers
 
 
 def notify_classroom(results):
@@ -12,115 +13,172 @@ def notify_classroom(results):
     Args:
         results (list): List of dicts, each containing runner results with 'max' and 'points'.
     """
+    payload = build_classroom_payload(results)
+    if payload is None:
+        return
+
+    send_classroom_payload(payload)
+
+
+def build_classroom_payload(results, check_run_id: int = None) -> dict | None:
+    """
+    Combine the results and collect everything needed to update the check run.
+
+    Args:
+        results (list): List of dicts, each containing runner results with 'max' and 'points'.
+        check_run_id (int): The check run to update if already known, otherwise it is looked up when sending.
+
+    Returns:
+        dict: The payload for send_classroom_payload, or None if the environment is invalid.
+    """
     # Combine max score and total score
     max_points = float(sum(result.get('max', 0) for result in results))
     total_points = float(sum(result.get('points', 0) for result in results))
 
     if max_points == 0:
         print(f'{bcolors.FAIL}❌ Max points are zero, exiting...{bcolors.ENDC}')
-        return
-
-    # Get GitHub token and repository details from environment variables
-    token = os.getenv('GH_TOKEN')
-    if not token:
-        print(f'{bcolors.FAIL}❌ GITHUB_TOKEN is missing{bcolors.ENDC}')
-        return
+        return None
 
     nwo = os.getenv('GITHUB_REPOSITORY', '/')
     if '/' not in nwo:
         print(f'{bcolors.FAIL}❌ Invalid GITHUB_REPOSITORY format{bcolors.ENDC}')
-        return
+        return None
 
     owner, repo = nwo.split('/')
     if not owner or not repo:
         print(f'{bcolors.FAIL}❌ Owner or repository is missing{bcolors.ENDC}')
-        return
+        return None
 
     try:
         run_id = int(os.getenv('GITHUB_RUN_ID', ''))
     except ValueError:
         print(f'{bcolors.FAIL}❌ Invalid GITHUB_RUN_ID{bcolors.ENDC}')
-        return
+        return None
 
-    # Fetch the workflow run using GitHub CLI
-    workflow_run_response = subprocess.run(
-        ['gh', 'api', f'/repos/{owner}/{repo}/actions/runs/{run_id}'],
-        capture_output=True,
-        text=True,
-    )
+    return {
+        'owner': owner,
+        'repo': repo,
+        'run_id': run_id,
+        'total_points': total_points,
+        'max_points': max_points,
+        'check_run_id': check_run_id,
+    }
 
-    if workflow_run_response.returncode != 0:
-        print(
-            f'{bcolors.FAIL}❌ Failed to fetch workflow run: {workflow_run_response.stderr}{bcolors.ENDC}'
-        )
-        return
 
-    try:
-        workflow_data = json.loads(workflow_run_response.stdout)
-        check_suite_url = workflow_data.get('check_suite_url')
-        check_suite_id = check_suite_url.split('/')[-1]
-    except (json.JSONDecodeError, AttributeError, IndexError):
-        print(f'{bcolors.FAIL}❌ Error parsing workflow run response{bcolors.ENDC}')
+def send_classroom_payload(payload: dict) -> bool:
+    """
+    Update the check run of the workflow run with the autograding results.
 
-        return
+    Args:
+        payload (dict): The payload created by build_classroom_payload.
 
-    # List the check runs for the suite using GitHub CLI
-    check_runs_response = subprocess.run(
-        [
-            'gh',
-            'api',
-            f'/repos/{owner}/{repo}/check-suites/{check_suite_id}/check-runs',
+    Returns:
+        bool: True if the check run was updated.
+    """
+    # Get GitHub token from environment variables
+    if not os.getenv('GH_TOKEN'):
+        print(f'{bcolors.FAIL}❌ GITHUB_TOKEN is missing{bcolors.ENDC}')
+        return False
+
+    owner, repo = payload['owner'], payload['repo']
+    check_run_id = payload.get('check_run_id')
+    if check_run_id is None:
+        try:
+            check_run_id = fetch_check_run_id(owner, repo, payload['run_id'])
+        except LookupError as e:
+            print(f'{bcolors.FAIL}❌ {e}{bcolors.ENDC}')
+            return False
+
+    # Update the check run with the autograding results
+    total_points, max_points = payload['total_points'], payload['max_points']
+    text = f'Points {total_points}/{max_points}'
+    output = {
+        'title': 'Autograding',
+        'summary': text,
+        'text': json.dumps({'totalPoints': total_points, 'maxPoints': max_points}),
+        'annotations': [
+            {
+                'path': '.github',
+                'start_line': 1,
+                'end_line': 1,
+                'annotation_level': 'notice',
+                'message': text,
+                'title': 'Autograding complete',
+            }
         ],
-        capture_output=True,
-        text=True,
-    )
+    }
 
-    if check_runs_response.returncode != 0:
-        print(
-            f'{bcolors.FAIL}❌ Failed to list check runs: {check_runs_response.stderr}{bcolors.ENDC}'
+    try:
+        update_response = requests.patch(
+            f'{github_api_url()}/repos/{owner}/{repo}/check-runs/{check_run_id}',
+            headers=github_headers(),
+            json={'output': output},
+            timeout=30,
         )
-        return
+    except requests.RequestException:
+        update_response = None
+
+    if update_response is None or update_response.status_code != 200:
+        print(f'{bcolors.FAIL}❌ Failed to add Check-Run for Github-Classroom.{bcolors.ENDC}')
+        return False
+
+    print(f'{bcolors.OKGREEN}✅ Added Check-Run for Github-Classroom.{bcolors.ENDC}')
+    return True
+
+
+def fetch_check_run_id(owner: str, repo: str, run_id: int) -> int:
+    """
+    Look up the check run of a workflow run. Does not print, so it can run in the background.
+
+    Args:
+        owner (str): The owner of the repository.
+        repo (str): The name of the repository.
+        run_id (int): The id of the workflow run.
+
+    Returns:
+        int: The id of the check run.
+
+    Raises:
+        LookupError: If the workflow run or the check run cannot be found.
+    """
+    api_url = github_api_url()
+    headers = github_headers()
 
     try:
-        check_runs_data = json.loads(check_runs_response.stdout)
-        check_run_id = check_runs_data['check_runs'][0].get('id')
-    except (json.JSONDecodeError, KeyError, IndexError):
-        print(
-            f'{bcolors.FAIL}❌ No matching check run found or error parsing response.{bcolors.ENDC}'
+        # Fetch the workflow run
+        workflow_run_response = requests.get(
+            f'{api_url}/repos/{owner}/{repo}/actions/runs/{run_id}',
+            headers=headers,
+            timeout=30,
         )
-        return
+    except requests.RequestException as e:
+        raise LookupError(f'Failed to fetch workflow run: {e}') from e
 
-    # Update the check run with the autograding results using GitHub CLI
-    text = f'Points {total_points}/{max_points}'
-    update_command = [
-        'gh',
-        'api',
-        f'/repos/{owner}/{repo}/check-runs/{check_run_id}',
-        '--method',
-        'PATCH',
-        '-f',
-        'output[title]=Autograding',
-        '-f',
-        f'output[summary]={text}',
-        '-f',
-        f'output[text]={json.dumps({"totalPoints": total_points, "maxPoints": max_points})}',
-        '-F',
-        'output[annotations][][path]=.github',
-        '-F',
-        'output[annotations][][start_line]=1',
-        '-F',
-        'output[annotations][][end_line]=1',
-        '-F',
-        'output[annotations][][annotation_level]=notice',
-        '-F',
-        f'output[annotations][][message]={text}',
-        '-F',
-        'output[annotations][][title]=Autograding complete',
-    ]
-
-    update_response = subprocess.run(update_command, capture_output=True, text=True)
-    if update_response.returncode != 0:
-        print(f'{bcolors.FAIL}❌ Failed to add Check-Run for Github-Classroom.{bcolors.ENDC}')
-    else:
-        print(f'{bcolors.OKGREEN}✅ Added Check-Run for Github-Classroom.{bcolors.ENDC}')
-        return
+    if workflow_run_response.status_code != 200:
+        raise LookupError(f'Failed to fetch workflow run: {workflow_run_response.text}')
+
+    try:
+        workflow_data = workflow_run_response.json()
+        check_suite_url = workflow_data.get('check_suite_url')
+        check_suite_id = check_suite_url.split('/')[-1]
+    except (ValueError, AttributeError, IndexError) as e:
+        raise LookupError('Error parsing workflow run response') from e
+
+    try:
+        # List the check runs for the suite
+        check_runs_response = requests.get(
+            f'{api_url}/repos/{owner}/{repo}/check-suites/{check_suite_id}/check-runs',
+            headers=headers,
+            timeout=30,
+        )
+    except requests.RequestException as e:
+        raise LookupError(f'Failed to list check runs: {e}') from e
+
+    if check_runs_response.status_code != 200:
+        raise LookupError(f'Failed to list check runs: {check_runs_response.text}')
+
+    try:
+        check_runs_data = check_runs_response.json()
+        return check_runs_data['check_runs'][0]['id']
+    except (ValueError, KeyError, IndexError) as e:
+        raise LookupError('No matching check run found or error parsing response.') from e
@@ -17,11 +17,170 @@ Usage:
 - Place the `conftest.py` file in the root directory of your test suite or in any subdirectory where you want
   the custom hooks to be applied.
 - Run your pytest-based tests as usual, and the custom assertion representation will be automatically utilized.
+
+Values are formatted with `str`, as long as the text fits into `ASSERTREPR_MAXSIZE` characters (default 300).
+The size of containers is estimated without formatting them, larger values are summarized by their type and length,
+followed by a window around the first difference to the other value, so huge strings, lists, dicts or DataFrames
+do not flood the output or the feedback.
+Each value stays on a single line, which is what the pytest runner expects when it extracts them.
 """
+import os
+import reprlib
+
+MAX_SIZE = int(os.getenv('ASSERTREPR_MAXSIZE', '300'))
+CONTEXT = 3  # items shown before and after the first difference
+
+_item_repr = reprlib.Repr()
+_item_repr.maxstring = 20
+_item_repr.maxother = 20
+
 
-def pytest_assertrepr_compare(op, left, right):
+def pytest_assertrepr_compare(op, left, right):  # pylint: disable=unused-argument
     return [
-        "Comparing values:",
-        f"   expected: {right}",
-        f"   actual  : {left}",
+        'Comparing values:',
+        f'   expected: {bounded_repr(right, left)}',
+        f'   actual  : {bounded_repr(left, right)}',
+    ]
+
+
+def bounded_repr(value, other, max_size=MAX_SIZE):
+    """
+    Format a value for the assertion output, at most max_size characters long.
+    :param value: The value to format
+    :param other: The value it was compared to, used to find the first difference
+    :param max_size: The maximum length of the text
+    """
+    if isinstance(value, str):
+        text = value if len(value) <= max_size else _summarize_str(value, other, max_size)
+    elif isinstance(value, (list, tuple, dict, set, frozenset)):
+        # Only containers which fit are formatted as before
+        text = f'{value}' if _text_length(value, max_size + 1) <= max_size else None
+        if text is None or len(text) > max_size:
+            text = _summarize_container(value, other, max_size)
+    else:
+        text = f'{value}'
+        if len(text) > max_size:
+            text = f'{_describe(value)}: {text!r}'
+
+    if len(text) > max_size:
+        text = text[:max_size - 3] + '...'
+    return text
+
+
+def _describe(value):
+    """Type and size of a value, e.g. list(len=1000) or DataFrame(shape=(100, 3))"""
+    shape = getattr(value, 'shape', None)
+    if shape is not None:
+        return f'{type(value).__name__}(shape={shape})'
+    try:
+        return f'{type(value).__name__}(len={len(value)})'
+    except TypeError:
+        return type(value).__name__
+
+
+def _text_length(value, limit):
+    """Estimated length of the formatted value, counting stops as soon as limit is reached"""
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        items = (item for pair in value.items() for item in pair)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = value
+    else:
+        return len(repr(value))
+
+    length = 2
+    for item in items:
+        length += _text_length(item, limit - length) + 2
+        if length >= limit:
+            break
+    return length
+
+
+def _summarize_container(value, other, max_size):
+    if isinstance(value, (list, tuple)):
+        return _summarize_sequence(value, other, max_size)
+    if isinstance(value, dict):
+        return _summarize_dict(value, other, max_size)
+    return _summarize_set(value, other)
+
+
+def _difference_repr(item, other_item, max_size):
+    """Short repr of an item, long strings show the window around their first difference"""
+    if isinstance(item, str) and isinstance(other_item, str) and len(item) > _item_repr.maxstring:
+        return _summarize_str(item, other_item, max_size // 3)
+    return _item_repr.repr(item)
+
+
+def _first_difference(value, other):
+    """Index of the first item that differs from other, or None if other is not comparable"""
+    try:
+        for index, (item, other_item) in enumerate(zip(value, other)):
+            if item != other_item:
+                return index
+        return min(len(value), len(other))
+    except TypeError:
+        return None
+
+
+def _summarize_str(value, other, max_size):
+    index = _first_difference(value, other) if isinstance(other, str) else None
+    if index is None:
+        return f'{_describe(value)}: {value[:max_size]!r}'
+
+    width = max_size // 4
+    start = max(0, index - width)
+    window = value[start:index + width]
+    prefix = '...' if start > 0 else ''
+    suffix = '...' if index + width < len(value) else ''
+    return f'{_describe(value)}, first difference at index {index}: {prefix}{window!r}{suffix}'
+
+
+def _summarize_sequence(value, other, max_size):
+    index = _first_difference(value, other) if isinstance(other, (list, tuple)) else None
+    if index is None:
+        index = 0
+        description = _describe(value)
+    else:
+        description = f'{_describe(value)}, first difference at index {index}'
+
+    start = max(0, index - CONTEXT)
+    end = min(len(value), index + CONTEXT + 1)
+    items = []
+    for position in range(start, end):
+        if position == index and isinstance(other, (list, tuple)) and index < len(other):
+            items.append(f'{position}: {_difference_repr(value[position], other[position], max_size)}')
+        else:
+            items.append(f'{position}: {_item_repr.repr(value[position])}')
+    prefix = '..., ' if start > 0 else ''
+    suffix = ', ...' if end < len(value) else ''
+    return f'{description}: [{prefix}{", ".join(items)}{suffix}]'
+
+
+def _summarize_dict(value, other, max_size):
+    description = _describe(value)
+    keys = list(value)[:2 * CONTEXT + 1]
+    if isinstance(other, dict):
+        missing = object()
+        key = next((key for key in value if other.get(key, missing) != value[key]), missing)
+        if key is missing:
+            key = next((key for key in other if key not in value), missing)
+            if key is not missing:
+                description += f', missing key {_item_repr.repr(key)}'
+        else:
+            description += f', first difference at key {_item_repr.repr(key)}'
+            keys = [key]
+
+    other_dict = other if isinstance(other, dict) else {}
+    items = [
+        f'{_item_repr.repr(key)}: {_difference_repr(value[key], other_dict.get(key), max_size)}'
+        for key in keys
     ]
+    return f'{description}: {{{", ".join(items)}, ...}}'
+
+
+def _summarize_set(value, other):
+    if isinstance(other, (set, frozenset)):
+        extra = list(value - other)
+        return f'{_describe(value)}, {len(extra)} not in the other set: {_item_repr.repr(set(extra[:2 * CONTEXT + 1]))}'
+    return f'{_describe(value)}: {_item_repr.repr(value)}'
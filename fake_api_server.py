@@ -0,0 +1,292 @@
+""" Local stand-in for the Moodle and GitHub APIs used by the notifiers.
+    It implements the endpoints
+    - POST /webservice/rest/server.php (wsfunction mod_externalassignment_update_grade, XML response)
+    - GET /repos/{owner}/{repo}/collaborators
+    - GET /repos/{owner}/{repo}/actions/runs/{run_id}
+    - GET /repos/{owner}/{repo}/check-suites/{check_suite_id}/check-runs
+    - PATCH /repos/{owner}/{repo}/check-runs/{check_run_id}
+    Latency, error rate and rate limit are configurable with FakeApiConfig.
+    Point the notifiers to the server with TARGET_URL and GITHUB_API_URL.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import bcolors
+
+MOODLE_FUNCTION = 'mod_externalassignment_update_grade'
+
+MOODLE_RESPONSE = """<?xml version="1.0" encoding="UTF-8" ?>
+<RESPONSE>
+<SINGLE>
+<KEY name="name"><VALUE>{name}</VALUE>
+</KEY>
+<KEY name="message"><VALUE>{message}</VALUE>
+</KEY>
+</SINGLE>
+</RESPONSE>
+"""
+
+MOODLE_EXCEPTION = """<?xml version="1.0" encoding="UTF-8" ?>
+<EXCEPTION class="{exception}">
+<ERRORCODE>{errorcode}</ERRORCODE>
+<MESSAGE>{message}</MESSAGE>
+</EXCEPTION>
+"""
+
+GITHUB_ROUTES = [
+    ('GET', re.compile(r'^/repos/([^/]+)/([^/]+)/collaborators$'), 'collaborators'),
+    ('GET', re.compile(r'^/repos/([^/]+)/([^/]+)/actions/runs/(\d+)$'), 'workflow_run'),
+    ('GET', re.compile(r'^/repos/([^/]+)/([^/]+)/check-suites/(\d+)/check-runs$'), 'check_runs'),
+    ('PATCH', re.compile(r'^/repos/([^/]+)/([^/]+)/check-runs/(\d+)$'), 'update_check_run'),
+]
+
+
+@dataclass
+class FakeApiConfig:
+    """
+    Behaviour of the fake server
+    """
+
+    latency: float = 0.0  # seconds added to every response
+    jitter: float = 0.0  # random extra latency, uniform in [0, jitter]
+    error_rate: float = 0.0  # probability of an injected error
+    rate_limit: float = 0.0  # requests per second, 0 disables the limit
+    collaborators: list = field(default_factory=lambda: ['student'])
+    seed: int = None
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` requests per second with a burst of one second
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the configuration and the request statistics.
+    The statistics count every request per route, and the rate limited, failed and invalid ones separately.
+    """
+
+    daemon_threads = True
+    request_queue_size = 256  # deadline spikes open many connections at once
+
+    def __init__(self, address, config: FakeApiConfig):
+        super().__init__(address, FakeApiHandler)
+        self.config = config
+        self.limiter = RateLimiter(config.rate_limit)
+        self.random = random.Random(config.seed)
+        self.random_lock = threading.Lock()
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+        self.grades = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def roll(self) -> float:
+        with self.random_lock:
+            return self.random.random()
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for the Moodle and GitHub endpoints
+    """
+
+    server: FakeApiServer
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PATCH(self):
+        self.handle_request('PATCH')
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet
+
+    def handle_request(self, method: str):
+        config = self.server.config
+        delay = config.latency + config.jitter * self.server.roll()
+        if delay > 0:
+            time.sleep(delay)
+
+        parsed = urllib.parse.urlparse(self.path)
+        body = self.read_body()
+        is_moodle = parsed.path.rstrip('/') == '/webservice/rest/server.php'
+
+        # Resolve the route first, so rate limited and failed requests are counted per route as well
+        route, groups = None, ()
+        if is_moodle and method == 'POST':
+            route = 'update_grade'
+        for route_method, pattern, name in GITHUB_ROUTES:
+            match = pattern.match(parsed.path)
+            if match and route_method == method:
+                route, groups = name, match.groups()
+        if route is None:
+            self.send_json(404, {'message': 'Not Found'})
+            return
+        self.server.count(route)
+
+        if not self.server.limiter.allow():
+            self.server.count('rate_limited')
+            self.send_json(429, {'message': 'API rate limit exceeded'}, {'Retry-After': '1'})
+            return
+
+        if config.error_rate > 0 and self.server.roll() < config.error_rate:
+            self.server.count('errors')
+            if is_moodle:
+                self.send_xml(MOODLE_EXCEPTION.format(
+                    exception='dml_write_exception',
+                    errorcode='dmlwriteexception',
+                    message='Error writing to database',
+                ))
+            else:
+                self.send_json(502, {'message': 'Server Error'})
+            return
+
+        if is_moodle:
+            self.update_grade(urllib.parse.parse_qs(parsed.query), urllib.parse.parse_qs(body))
+        else:
+            getattr(self, route)(*groups, body=body)
+
+    def read_body(self) -> str:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length).decode('UTF-8') if length else ''
+
+    def update_grade(self, query: dict, form: dict):
+        if query.get('wsfunction', [''])[0] != MOODLE_FUNCTION:
+            self.server.count('moodle_invalid')
+            self.send_xml(MOODLE_EXCEPTION.format(
+                exception='dml_missing_record_exception',
+                errorcode='invalidrecord',
+                message='Can\'t find data record in database table external_functions.',
+            ))
+            return
+
+        missing = [key for key in ('assignment_name', 'user_name', 'points', 'max') if key not in form]
+        if missing:
+            self.server.count('moodle_invalid')
+            self.send_xml(MOODLE_EXCEPTION.format(
+                exception='invalid_parameter_exception',
+                errorcode='invalidparameter',
+                message=f'Invalid parameter value detected (Missing required key in single structure: {missing[0]})',
+            ))
+            return
+
+        key = (form['assignment_name'][0], form['user_name'][0])
+        self.server.grades[key] = float(form['points'][0])
+        self.send_xml(MOODLE_RESPONSE.format(name='success', message='Grade updated'))
+
+    def collaborators(self, owner, repo, body):
+        self.send_json(200, [{'login': login} for login in self.server.config.collaborators])
+
+    def workflow_run(self, owner, repo, run_id, body):
+        check_suite_id = int(run_id) * 10
+        self.send_json(200, {
+            'id': int(run_id),
+            'check_suite_url': f'{self.server.url}/repos/{owner}/{repo}/check-suites/{check_suite_id}',
+        })
+
+    def check_runs(self, owner, repo, check_suite_id, body):
+        check_run_id = int(check_suite_id) * 10
+        self.send_json(200, {'total_count': 1, 'check_runs': [{'id': check_run_id, 'name': 'autograding'}]})
+
+    def update_check_run(self, owner, repo, check_run_id, body):
+        try:
+            output = json.loads(body).get('output', {}) if body else {}
+        except ValueError:
+            self.send_json(400, {'message': 'Problems parsing JSON'})
+            return
+        self.send_json(200, {'id': int(check_run_id), 'output': output})
+
+    def send_xml(self, text: str):
+        # Moodle reports errors with status 200 and an EXCEPTION document
+        self.send_body(200, text.encode('UTF-8'), 'application/xml; charset=utf-8')
+
+    def send_json(self, status: int, data, headers: dict = None):
+        self.send_body(status, json.dumps(data).encode('UTF-8'), 'application/json', headers)
+
+    def send_body(self, status: int, data: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_fake_server(config: FakeApiConfig = None, host: str = '127.0.0.1', port: int = 0) -> FakeApiServer:
+    """
+    Start the fake server in a background thread.
+    :param config: The behaviour of the server
+    :param host: The host to bind to
+    :param port: The port to bind to, 0 picks a free port
+    :return: The running server, call shutdown() to stop it
+    """
+    server = FakeApiServer((host, port), config or FakeApiConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for the Moodle and GitHub APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of an injected error')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='requests per second, 0 = unlimited')
+    args = parser.parse_args()
+
+    fake_server = FakeApiServer(
+        (args.host, args.port),
+        FakeApiConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+        ),
+    )
+    print(f'{bcolors.OKCYAN}Fake Moodle and GitHub API on {fake_server.url}{bcolors.ENDC}')
+    try:
+        fake_server.serve_forever()
+    except KeyboardInterrupt:
+        fake_server.server_close()
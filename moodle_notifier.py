@@ -5,7 +5,7 @@ import xml.etree.ElementTree as ET
 
 import requests
 
-from utils import bcolors
+from utils import bcolors, github_api_url, github_headers
 
 DEBUG = False
 
@@ -21,31 +21,41 @@ def get_collaborators(repo_path: str):
     Returns:
         list: A list of login names of collaborators or team members.
     """
+    try:
+        return fetch_collaborators(repo_path)
+    except LookupError as e:
+        print(e)
+        return []
+
+
+def fetch_collaborators(repo_path: str) -> list:
+    """
+    Fetch the login names of the collaborators. Does not print, so it can run in the background.
+
+    Args:
+        repo_path (str): The repository path in the format 'owner/repo'.
+
+    Returns:
+        list: A list of login names of collaborators.
+
+    Raises:
+        LookupError: If the collaborators cannot be fetched.
+    """
     owner, repo = repo_path.split('/')
 
     # GitHub API URL for collaborators
-    collaborators_url = f'https://api.github.com/repos/{owner}/{repo}/collaborators'
-
-    # Authorization headers
-    headers = {
-        'Authorization': f'token {os.getenv("GH_TOKEN")}',  # GitHub token from env variables
-        'Accept': 'application/vnd.github.v3+json'
-    }
+    collaborators_url = f'{github_api_url()}/repos/{owner}/{repo}/collaborators'
 
     # Fetch direct collaborators
-    response = requests.get(collaborators_url, headers=headers)
-    collaborators = []
-
-    if response.status_code == 200:
-        collaborators = [collab['login'] for collab in response.json()]
-        # If we found collaborators, return them
-        if collaborators:
-            return collaborators
-    else:
-        print(f'Failed to fetch collaborators: {response.status_code}')
-        print(response.text)
+    try:
+        response = requests.get(collaborators_url, headers=github_headers(), timeout=30)
+    except requests.RequestException as e:
+        raise LookupError(f'Failed to fetch collaborators: {e}') from e
+
+    if response.status_code != 200:
+        raise LookupError(f'Failed to fetch collaborators: {response.status_code}\n{response.text}')
 
-    return collaborators
+    return [collab['login'] for collab in response.json()]
 
 
 def update_moodle(test_result_collection: list):
@@ -55,18 +65,32 @@ def update_moodle(test_result_collection: list):
     Args:
         test_result_collection (list): A list containing results from tests and linting.
     """
+    payload = build_moodle_payload(test_result_collection)
+    if not send_moodle_payload(payload):
+        sys.exit(1)
+
+
+def build_moodle_payload(test_result_collection: list, collaborators: list = None) -> dict:
+    """
+    Combine the test results into the payload for the Moodle grade update.
+
+    Args:
+        test_result_collection (list): A list containing results from tests and linting.
+        collaborators (list): The collaborators if already fetched, otherwise they are fetched now.
+
+    Returns:
+        dict: The payload for send_moodle_payload.
+    """
     # Assuming the environment variables are already set, similar to the original implementation.
     env_vars = {
-        'target_url': os.environ['TARGET_URL'],
-        'token': os.getenv('TOKEN'),
-        'function': os.environ['FUNCTION'],
         'username': os.environ['USERNAME'],
         'server': os.environ['SERVER'],
         'repo_path': os.environ['REPO'],
     }
 
     # Get collaborators with 'admin' role
-    collaborators = get_collaborators(env_vars['repo_path'])
+    if collaborators is None:
+        collaborators = get_collaborators(env_vars['repo_path'])
     if len(collaborators) > 0:
         env_vars['username'] = collaborators[0]
 
@@ -88,7 +112,6 @@ def update_moodle(test_result_collection: list):
     external_link = f'{env_vars["server"]}/{env_vars["repo_path"]}'
     result['feedback'] += f'Link zum Repository: [{external_link}]({external_link})\n'
 
-    url = f'{env_vars["target_url"]}/webservice/rest/server.php/?wstoken={env_vars["token"]}&wsfunction={env_vars["function"]}'
     feedback = urllib.parse.quote(result['feedback'])
 
     payload = {
@@ -103,19 +126,44 @@ def update_moodle(test_result_collection: list):
     print_moodle_payload(payload)
     print(f"👤 Collaborators: {', '.join(collaborators)}")
 
+    return payload
+
+
+def send_moodle_payload(payload: dict) -> bool:
+    """
+    Send the payload to the Moodle web service.
+    The token is read from the environment at send time, so it is never stored with the payload.
+
+    Args:
+        payload (dict): The payload created by build_moodle_payload.
+
+    Returns:
+        bool: True if Moodle accepted the grade.
+    """
+    env_vars = {
+        'target_url': os.environ['TARGET_URL'],
+        'token': os.getenv('TOKEN'),
+        'function': os.environ['FUNCTION'],
+    }
+    url = f'{env_vars["target_url"]}/webservice/rest/server.php/?wstoken={env_vars["token"]}&wsfunction={env_vars["function"]}'
+
     if DEBUG:
         print(url)
         print(payload)
 
     # Send the request to Moodle
-    response = requests.post(url=url, data=payload, timeout=30)
+    try:
+        response = requests.post(url=url, data=payload, timeout=30)
+    except requests.RequestException as e:
+        print(f'{bcolors.FAIL}❌ Upload to Moodle failed: {e}{bcolors.ENDC}')
+        return False
 
     if DEBUG:
         print(response)
         print(response.text)
 
     # Parse the response from Moodle
-    parse_moodle_response(response.text)
+    return parse_moodle_response(response.text)
 
 
 def wrap_feedback_table(test_result: dict) -> str:
@@ -145,9 +193,12 @@ def wrap_feedback_table(test_result: dict) -> str:
     return feedback
 
 
-def parse_moodle_response(response_text: str) -> None:
+def parse_moodle_response(response_text: str) -> bool:
     """
     Parse the Moodle API response and handle success or failure.
+
+    Returns:
+        bool: True if the upload was successful.
     """
     xml_start = response_text.find('<?xml')
 
@@ -159,15 +210,13 @@ def parse_moodle_response(response_text: str) -> None:
             name_key = root.find(".//KEY[@name='name']/VALUE")
             if name_key is not None and 'success' in name_key.text:
                 print(f'{bcolors.OKGREEN}✅ Upload to Moodle successful.{bcolors.ENDC}')
-            else:
-                handle_moodle_error(root)
-                sys.exit(1)
+                return True
+            handle_moodle_error(root)
         except ET.ParseError as e:
             print(f'Failed to parse XML: {e}')
-            sys.exit(1)
     else:
         print('No valid XML found in the response.')
-        sys.exit(1)
+    return False
 
 
 def handle_moodle_error(root) -> None:
@@ -0,0 +1,163 @@
+""" Load benchmark for the notifiers against the local fake Moodle and GitHub API.
+    Every simulated submission calls get_collaborators, send_moodle_payload and send_classroom_payload,
+    the submissions run concurrently like grading jobs finishing at the same time.
+    The scenarios are
+    - class: a class of 30 submissions, 10 jobs at a time
+    - spike: 300 submissions right before a deadline, 100 jobs at a time
+    The submissions per second are printed for the scenario, and for every notifier
+    the requests per second answered by the fake server (including the rate limited and failed ones),
+    the failures and the latency percentiles.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from classroom_notifier import send_classroom_payload
+from fake_api_server import MOODLE_FUNCTION, FakeApiConfig, start_fake_server
+from moodle_notifier import get_collaborators, send_moodle_payload
+from utils import bcolors
+
+# Endpoints of the fake server called by each notifier, one submission calls each endpoint once
+ENDPOINTS = {
+    'get_collaborators': ['collaborators'],
+    'update_moodle': ['update_grade'],
+    'notify_classroom': ['workflow_run', 'check_runs', 'update_check_run'],
+}
+
+SCENARIOS = {
+    'class': {'submissions': 30, 'concurrency': 10},
+    'spike': {'submissions': 300, 'concurrency': 100},
+}
+
+
+def run_benchmark(submissions: int, concurrency: int, config: FakeApiConfig) -> dict:
+    """
+    Run the notifiers for a number of submissions against a fresh fake server.
+    :param submissions: The number of simulated submissions
+    :param concurrency: The number of submissions notified at the same time
+    :param config: The behaviour of the fake server
+    :return: The timings per notifier and the statistics of the server
+    """
+    server = start_fake_server(config)
+    os.environ.update({
+        'GITHUB_API_URL': server.url,
+        'GH_TOKEN': 'benchmark',
+        'TARGET_URL': server.url,
+        'TOKEN': 'benchmark',
+        'FUNCTION': MOODLE_FUNCTION,
+    })
+
+    def notify(number: int) -> dict:
+        repo_path = f'bzz/assignment-student{number}'
+        moodle_payload = {
+            'assignment_name': 'assignment',
+            'user_name': f'student{number}',
+            'points': 8.5,
+            'max': 10.0,
+            'externallink': f'https://github.com/{repo_path}',
+            'feedback': 'benchmark',
+        }
+        classroom_payload = {
+            'owner': 'bzz',
+            'repo': f'assignment-student{number}',
+            'run_id': number + 1,
+            'total_points': 8.5,
+            'max_points': 10.0,
+        }
+        return {
+            'get_collaborators': timed(lambda: len(get_collaborators(repo_path)) > 0),
+            'update_moodle': timed(lambda: send_moodle_payload(moodle_payload)),
+            'notify_classroom': timed(lambda: send_classroom_payload(classroom_payload)),
+        }
+
+    # The notifiers print for every request, keep the console for the report
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(notify, range(submissions)))
+    wall_time = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    timings = {}
+    for sample in samples:
+        for name, (duration, success) in sample.items():
+            timing = timings.setdefault(name, {'durations': [], 'failures': 0})
+            timing['durations'].append(duration)
+            if not success:
+                timing['failures'] += 1
+
+    return {'wall_time': wall_time, 'timings': timings, 'server': dict(server.stats)}
+
+
+def timed(func) -> tuple:
+    """Return the duration of a call and whether it succeeded"""
+    start = time.perf_counter()
+    try:
+        success = bool(func())
+    except Exception:  # a failing notifier is a measurement, not a crash of the benchmark
+        success = False
+    return time.perf_counter() - start, success
+
+
+def percentile(values: list, percent: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def print_report(name: str, submissions: int, concurrency: int, report: dict):
+    print('\n')
+    print(
+        f'{bcolors.HEADER}################################################################################{bcolors.ENDC}'
+    )
+    print(
+        f'{bcolors.BOLD}{bcolors.HEADER}Scenario {name}: {submissions} submissions, {concurrency} concurrent{bcolors.ENDC}'
+    )
+    print(
+        f'{bcolors.HEADER}################################################################################{bcolors.ENDC}'
+    )
+    print(f'{"notifier":<20}{"req/s":>10}{"fail":>7}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    for notifier, timing in report['timings'].items():
+        durations = timing['durations']
+        requests_served = sum(report['server'].get(endpoint, 0) for endpoint in ENDPOINTS[notifier])
+        throughput = requests_served / report['wall_time']
+        print(
+            f'{notifier:<20}{throughput:>10.1f}{timing["failures"]:>7}'
+            f'{percentile(durations, 50) * 1000:>10.1f}'
+            f'{percentile(durations, 95) * 1000:>10.1f}'
+            f'{percentile(durations, 99) * 1000:>10.1f}'
+            f'{max(durations) * 1000:>10.1f}'
+        )
+    print(
+        f'{bcolors.OKCYAN}⏱️ Wall time: {report["wall_time"]:.2f}s, {submissions / report["wall_time"]:.1f} submissions/s{bcolors.ENDC}'
+    )
+    print(f'{bcolors.OKCYAN}Server: {report["server"]}{bcolors.ENDC}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the notifiers against the fake API server')
+    parser.add_argument('--scenario', choices=[*SCENARIOS, 'all'], default='all')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.05, help='random extra latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of an injected error')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='requests per second, 0 = unlimited')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    selected = SCENARIOS if args.scenario == 'all' else {args.scenario: SCENARIOS[args.scenario]}
+    for scenario, settings in selected.items():
+        fake_config = FakeApiConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            seed=args.seed,
+        )
+        result = run_benchmark(settings['submissions'], settings['concurrency'], fake_config)
+        print_report(scenario, settings['submissions'], settings['concurrency'], result)
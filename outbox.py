@@ -0,0 +1,277 @@
+""" Durable on-disk outbox for the notifications sent after grading.
+    Grading only writes the finished payloads to the outbox directory, a flusher delivers them later.
+    The outbox directory (env OUTBOX_DIR, default ./.autograde_outbox) has four subdirectories
+    - pending: payloads waiting for delivery
+    - inflight: payloads claimed by a running flusher
+    - sent: payloads that were delivered
+    - failed: payloads given up after MAX_TOTAL_ATTEMPTS failed deliveries
+    Each entry is a json file with the keys
+    - kind: The notifier to use (moodle or classroom)
+    - key: The submission and commit, a newer entry for the same key replaces a pending one
+    - digest: The digest of the payload, the same payload is never sent twice
+    - payload: The payload for the notifier
+    - attempts: The number of failed deliveries
+    The flusher can run at the end of the grading job, as a batch (python outbox.py)
+    or as a long-running sender (python outbox.py --watch).
+    The grading job runs on an ephemeral runner, the workflow uploads the undelivered entries
+    (pending and failed) as the artifact autograde-outbox-<run attempt>. A separate sender reaches them with
+        gh run download <run id> --repo <student repo> --pattern 'autograde-outbox-*' --dir <dir>
+    and delivers them with OUTBOX_DIR=<dir>/autograde-outbox-<run attempt> python outbox.py.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from classroom_notifier import send_classroom_payload
+from moodle_notifier import send_moodle_payload
+from utils import bcolors
+
+MAX_ATTEMPTS = 3
+MAX_TOTAL_ATTEMPTS = 10
+MAX_WORKERS = 4
+BACKOFF_SECONDS = 2
+STALE_SECONDS = 600
+
+SENDERS = {
+    'moodle': send_moodle_payload,
+    'classroom': send_classroom_payload,
+}
+
+
+def outbox_dir(subdir: str) -> str:
+    """Return the path of a subdirectory of the outbox and create it if needed"""
+    path = os.path.join(os.getenv('OUTBOX_DIR', './.autograde_outbox'), subdir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def submission_key() -> str:
+    """The submission and commit of the current grading job"""
+    repo = os.getenv('REPO') or os.getenv('GITHUB_REPOSITORY', '')
+    return f'{repo}@{os.getenv("GITHUB_SHA", "")}'
+
+
+def entry_filename(kind: str, key: str) -> str:
+    digest = hashlib.sha1(key.encode('UTF-8')).hexdigest()
+    return f'{kind}-{digest}.json'
+
+
+def payload_digest(payload: dict) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('UTF-8')).hexdigest()
+
+
+def is_sent(sent_path: str, digest: str) -> bool:
+    """Check whether the payload with this digest was the last one delivered for the entry"""
+    if not os.path.exists(sent_path):
+        return False
+    sent_entry = load_entry(sent_path)
+    return sent_entry is not None and sent_entry.get('digest') == digest
+
+
+def enqueue(kind: str, payload: dict, key: str = None) -> str | None:
+    """
+    Write a payload to the outbox.
+    A newer payload for the same submission and commit replaces a pending one,
+    the same payload that was already delivered is not queued again (a regrade with other points is).
+
+    Args:
+        kind (str): The notifier to use, a key of SENDERS.
+        payload (dict): The payload for the notifier.
+        key (str): The submission and commit, defaults to the current grading job.
+
+    Returns:
+        str: The path of the entry, or None if it was already delivered.
+    """
+    key = key or submission_key()
+    filename = entry_filename(kind, key)
+    digest = payload_digest(payload)
+    if is_sent(os.path.join(outbox_dir('sent'), filename), digest):
+        print(f'{bcolors.WARNING}💤 {kind} notification for {key} was already sent{bcolors.ENDC}')
+        return None
+
+    entry = {
+        'kind': kind,
+        'key': key,
+        'digest': digest,
+        'payload': payload,
+        'attempts': 0,
+        'created': time.time(),
+    }
+    path = os.path.join(outbox_dir('pending'), filename)
+    write_entry(path, entry)
+    return path
+
+
+def flush_outbox(max_workers: int = MAX_WORKERS, max_attempts: int = MAX_ATTEMPTS) -> list:
+    """
+    Deliver all pending entries of the outbox.
+
+    Args:
+        max_workers (int): The number of entries delivered concurrently.
+        max_attempts (int): The number of attempts per entry in this flush.
+
+    Returns:
+        list: The kinds of the entries that could not be delivered.
+    """
+    reclaim_stale_entries()
+    pending_dir = outbox_dir('pending')
+    paths = sorted(
+        os.path.join(pending_dir, filename)
+        for filename in os.listdir(pending_dir)
+        if filename.endswith('.json')
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        delivered = list(executor.map(lambda path: deliver(path, max_attempts), paths))
+
+    failed = [kind for kind, success in delivered if not success]
+    if failed:
+        print(
+            f'{bcolors.FAIL}❌ {len(failed)} notification(s) could not be delivered: {", ".join(failed)}{bcolors.ENDC}'
+        )
+    dead_letters = os.listdir(outbox_dir('failed'))
+    if dead_letters:
+        print(
+            f'{bcolors.FAIL}❌ {len(dead_letters)} notification(s) gave up, see {outbox_dir("failed")}{bcolors.ENDC}'
+        )
+    return failed
+
+
+def deliver(path: str, max_attempts: int) -> tuple:
+    """
+    Claim and deliver a single entry, retrying with exponential backoff.
+
+    Returns:
+        tuple: The kind of the entry and True if it was delivered (or already delivered by another flusher).
+    """
+    filename = os.path.basename(path)
+    inflight_path = os.path.join(outbox_dir('inflight'), filename)
+    sent_path = os.path.join(outbox_dir('sent'), filename)
+    failed_path = os.path.join(outbox_dir('failed'), filename)
+    kind = filename.split('-', 1)[0]
+
+    # Claim the entry, another flusher may have been faster
+    try:
+        os.replace(path, inflight_path)
+    except FileNotFoundError:
+        return kind, True
+
+    entry = load_entry(inflight_path)
+    if entry is None:
+        return kind, False
+
+    digest = entry.get('digest') or payload_digest(entry['payload'])
+    entry['digest'] = digest
+    if is_sent(sent_path, digest):
+        os.remove(inflight_path)
+        return kind, True
+
+    sender = SENDERS.get(entry['kind'])
+    if sender is None:
+        print(f'{bcolors.FAIL}❌ Unknown notification kind {entry["kind"]}{bcolors.ENDC}')
+        give_back(inflight_path, path)
+        return kind, False
+
+    attempts = min(max_attempts, MAX_TOTAL_ATTEMPTS - entry['attempts'])
+    for attempt in range(attempts):
+        try:
+            success = sender(entry['payload'])
+        except Exception as e:  # a crashing notifier is a failed attempt, the entry stays in the outbox
+            print(f'{bcolors.FAIL}❌ Failed to send {entry["kind"]} notification: {e!r}{bcolors.ENDC}')
+            success = False
+        if success:
+            entry['sent'] = time.time()
+            write_entry(inflight_path, entry)
+            os.replace(inflight_path, sent_path)
+            return kind, True
+
+        entry['attempts'] += 1
+        write_entry(inflight_path, entry)
+        if attempt + 1 < attempts:
+            time.sleep(BACKOFF_SECONDS * 2**attempt)
+
+    if entry['attempts'] >= MAX_TOTAL_ATTEMPTS:
+        # Permanently rejected, e.g. an unknown user, stop retrying it
+        print(
+            f'{bcolors.FAIL}❌ Giving up {entry["kind"]} notification for {entry["key"]} after {entry["attempts"]} attempts{bcolors.ENDC}'
+        )
+        os.replace(inflight_path, failed_path)
+        return kind, False
+
+    # Give the entry back for the next flush
+    give_back(inflight_path, path)
+    return kind, False
+
+
+def give_back(inflight_path: str, path: str):
+    """Return a claimed entry to pending, unless a newer entry was enqueued in the meantime"""
+    # link fails if the target exists, unlike replace it never overwrites a newer entry
+    try:
+        os.link(inflight_path, path)
+    except FileExistsError:
+        pass
+    os.remove(inflight_path)
+
+
+def reclaim_stale_entries():
+    """Move entries back to pending whose flusher did not finish, e.g. because it was killed"""
+    inflight_dir = outbox_dir('inflight')
+    pending_dir = outbox_dir('pending')
+    now = time.time()
+    for filename in os.listdir(inflight_dir):
+        path = os.path.join(inflight_dir, filename)
+        try:
+            if now - os.path.getmtime(path) > STALE_SECONDS:
+                give_back(path, os.path.join(pending_dir, filename))
+        except FileNotFoundError:
+            continue
+
+
+def run_sender(interval: float, max_workers: int = MAX_WORKERS, max_attempts: int = MAX_ATTEMPTS):
+    """Flush the outbox every interval seconds until interrupted"""
+    print(f'{bcolors.OKCYAN}Watching outbox {outbox_dir("pending")}{bcolors.ENDC}')
+    try:
+        while True:
+            flush_outbox(max_workers, max_attempts)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def write_entry(path: str, entry: dict):
+    """Write an entry atomically, a crash never leaves a partial file"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='UTF-8') as file:
+        json.dump(entry, file)
+    os.replace(tmp_path, path)
+
+
+def load_entry(path: str) -> dict | None:
+    try:
+        with open(path, encoding='UTF-8') as file:
+            return json.load(file)
+    except (IOError, ValueError) as e:
+        print(f'{bcolors.FAIL}❌ Failed to read outbox entry {path}: {e}{bcolors.ENDC}')
+        return None
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    # loading variables from .env file
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Deliver the notifications in the outbox')
+    parser.add_argument('--watch', action='store_true', help='keep running and flush periodically')
+    parser.add_argument('--interval', type=float, default=30, help='seconds between flushes')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='concurrent deliveries')
+    parser.add_argument('--attempts', type=int, default=MAX_ATTEMPTS, help='attempts per entry')
+    args = parser.parse_args()
+
+    if args.watch:
+        run_sender(args.interval, args.workers, args.attempts)
+    elif flush_outbox(args.workers, args.attempts):
+        raise SystemExit(1)
@@ -10,22 +10,27 @@
     - message: The message
     - path: The path to the file
     - line: The line number
+    Only the first occurrences of each message id are listed (max_occurrences in the configuration file, default 5),
+    the remaining ones are summarized in a single message with their count, without a path and line.
     The points are calculated as follows:
     - The total points are calculated by dividing the global note by 10
     - The points are scaled to the maximum points specified in the configuration file
 """
 
 from pylint import lint
-from pylint.reporters import CollectingReporter
+from pylint.reporters import BaseReporter
 
+from similarity import is_student_file
 from utils import bcolors
 
 import os
 import json
 import glob
 import re
+from collections import Counter
 
 DEBUG = False
+MAX_OCCURRENCES = 5
 
 
 def run_pylint():
@@ -36,39 +41,29 @@ def run_pylint():
 
     config = load_config()
 
-    # If files are specified in the config, use only them
-    files = config.get('files')
-    if files:
-        pylint_opts.extend(files)
-
-    # Otherwise, use all Python files in the directory, except the ones specified in the ignore list
-    else:
-        python_files = glob.glob('*.py', recursive=True)
-
-        ignore_patterns = config.get('ignore')
-        if ignore_patterns:
-            for pattern in ignore_patterns:
-                regex = re.compile(pattern)
-                python_files = [f for f in python_files if not regex.match(f)]
+    pylint_opts.extend(select_files(config))
 
-        # Ensure the list is unique
-        pylint_opts.extend(list(set(python_files)))
+    # Fingerprint the parsed trees for the similarity check, see similarity.py
+    # The checker only runs with its message enabled, whatever the course rcfile disables
+    if os.getenv('SIMILARITY_DIR'):
+        pylint_opts.extend(['--load-plugins=similarity', '--enable=module-fingerprinted'])
 
-    reporter = CollectingReporter()
+    reporter = AggregatingReporter(config.get('max_occurrences', MAX_OCCURRENCES))
     pylint_obj = lint.Run(pylint_opts, reporter=reporter, exit=False)
     results = {'category': 'pylint', 'points': 0, 'max': 10, 'feedback': []}
-    max_value = load_config().get('max')
+    max_value = config.get('max')
     if max_value:
         results['max'] = max_value
 
-    for message in reporter.messages:
-        output = {
-            'category': message.category,
-            'message': f'{message.msg_id} {message.msg}',
-            'path': message.path,
-            'line': message.line,
-        }
-        results['feedback'].append(output)
+    results['feedback'] = reporter.feedback()
+
+    for checker in pylint_obj.linter.get_checkers():
+        if checker.name == 'fingerprints':
+            results['fingerprints'] = {
+                path: fingerprints
+                for path, fingerprints in checker.fingerprints.items()
+                if is_student_file(path, config.get('ignore'))
+            }
 
     # Scale the points to the max points, and ensure it is not negative
     results['points'] = round(
@@ -85,6 +80,86 @@ def run_pylint():
     return results
 
 
+class AggregatingReporter(BaseReporter):
+    """
+    Processes the messages as they are emitted, instead of collecting them.
+    Counts the messages per message id, and keeps only the first occurrences of each message id.
+    """
+
+    name = 'aggregating'
+
+    def __init__(self, max_occurrences: int = MAX_OCCURRENCES):
+        super().__init__()
+        self.max_occurrences = max_occurrences
+        self.counts = Counter()  # msg_id -> number of messages
+        self.occurrences = {}  # msg_id -> kept occurrences, in the order of the first message
+        self.categories = {}
+        self.symbols = {}
+
+    def handle_message(self, msg):
+        self.counts[msg.msg_id] += 1
+        occurrences = self.occurrences.setdefault(msg.msg_id, [])
+        if len(occurrences) < self.max_occurrences:
+            occurrences.append({
+                'category': msg.category,
+                'message': f'{msg.msg_id} {msg.msg}',
+                'path': msg.path,
+                'line': msg.line,
+            })
+        self.categories[msg.msg_id] = msg.category
+        self.symbols[msg.msg_id] = msg.symbol
+
+    def _display(self, layout):
+        pass
+
+    def feedback(self) -> list:
+        """
+        Create the feedback, the kept occurrences followed by a summary of the remaining ones
+        :return: A list of feedback messages with the keys category, message, path and line
+        """
+        feedback = []
+        for msg_id, occurrences in self.occurrences.items():
+            feedback.extend(occurrences)
+            count = self.counts[msg_id]
+            remaining = count - len(occurrences)
+            if remaining > 0:
+                plural = 'occurrence' if remaining == 1 else 'occurrences'
+                feedback.append({
+                    'category': self.categories[msg_id],
+                    'message': f'{msg_id} {self.symbols[msg_id]}: {remaining} more {plural} ({count} in total)',
+                    'path': '',
+                    'line': '',
+                })
+        return feedback
+
+
+def select_files(config: dict) -> list:
+    """
+    Select the files to lint
+    :param config: The lint configuration
+    :return: The files specified in the config, or all Python files except the ignored ones and conftest.py
+    """
+    # If files are specified in the config, use only them
+    files = config.get('files')
+    if files:
+        return files
+
+    # Otherwise, use all Python files in the directory, except the ones specified in the ignore list
+    python_files = glob.glob('*.py', recursive=True)
+
+    # The workflow copies conftest.py from the autograder, it must not affect the grade
+    python_files = [f for f in python_files if f != 'conftest.py']
+
+    ignore_patterns = config.get('ignore')
+    if ignore_patterns:
+        for pattern in ignore_patterns:
+            regex = re.compile(pattern)
+            python_files = [f for f in python_files if not regex.match(f)]
+
+    # Ensure the list is unique
+    return list(set(python_files))
+
+
 def load_file(filepath: str) -> dict:
     try:
         with open(filepath, encoding='UTF-8') as file:
@@ -127,8 +202,14 @@ def print_to_console(results: dict, config: dict):
         else:
             color = bcolors.ENDC  # Default color
 
+        if not feedback['path']:
+            location = ''
+        elif feedback['line'] == '':
+            location = f' in {feedback["path"]}'
+        else:
+            location = f' in {feedback["path"]} line {feedback["line"]}'
         print(
-            f'{color}{feedback["category"]} in {feedback["path"]} line {feedback["line"]}: {feedback["message"]}{bcolors.ENDC}'
+            f'{color}{feedback["category"]}{location}: {feedback["message"]}{bcolors.ENDC}'
         )
 
     print(
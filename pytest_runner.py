@@ -1,6 +1,8 @@
 import json
+import math
 import os
 import sys
+import time
 from dataclasses import dataclass
 from io import StringIO
 
@@ -24,17 +26,49 @@ def run_pytest():
         '--timeout_method=signal' # --signal is used to timeout single unit-test
     ]
 
+    budget = load_time_budget()
+    durations = load_durations()
+    scheduled_cases = schedule_cases(cases_list, durations) if budget else cases_list
+    case_results = {}
+    start_time = time.perf_counter()
 
     print_header(cases_list)
 
     passed_cases = 0
-    for casenum, case in enumerate(cases_list):
+    not_run_cases = 0
+    for casenum, case in enumerate(scheduled_cases):
         result = initialize_case_result(case)
+        case_results[id(case)] = result
         args[1] = case.function
         args[4] = f'--timeout={case.timeout}'
 
+        capped = False
+        if budget:
+            # Skip cases known to take longer than the remaining time, cheaper ones may still fit
+            remaining = budget - (time.perf_counter() - start_time)
+            known = case.function in durations
+            if remaining < 1 or (known and estimate_duration(case, durations) > remaining):
+                not_run_cases += 1
+                result['feedback'] = 'Not run: time budget exhausted'
+                print_test_header(case.name, casenum + 1, len(cases_list), status="out_of_time")
+                total_max += result['max']
+                continue
+            capped = math.floor(remaining) < case.timeout
+            args[4] = f'--timeout={min(case.timeout, math.floor(remaining))}'
+
+        case_start = time.perf_counter()
         with Capturing() as output:
             exitcode = pytest.main(args)
+
+        if capped and exitcode == ExitCode.TESTS_FAILED and is_timeout(output):
+            # The budget cut the case short, this is not a failure of the student
+            not_run_cases += 1
+            result['feedback'] = 'Interrupted: time budget exhausted'
+            print_test_header(case.name, casenum + 1, len(cases_list), status="interrupted")
+            total_max += result['max']
+            continue
+
+        record_duration(durations, case, time.perf_counter() - case_start)
         if exitcode == ExitCode.OK:
             passed_cases += 1
             summary = output[len(output) - 1]
@@ -68,13 +102,22 @@ def run_pytest():
 
         total_points += result['points']
         total_max += result['max']
-        results['feedback'].append(result)
+
+    # Report the feedback in the order of the config, not the order of execution
+    results['feedback'] = [case_results[id(case)] for case in cases_list]
     results['points'] = total_points
     results['max'] = total_max
+    # Keep the history whenever it is used or has an explicit location
+    if budget or os.getenv('FILE_DURATIONS'):
+        save_durations(durations)
     print('\n')
     print(
         f'{bcolors.OKCYAN}{bcolors.BOLD}🏆 Grand total tests passed: {passed_cases}/{len(cases_list)}{bcolors.ENDC}'
     )
+    if not_run_cases:
+        print(
+            f'{bcolors.WARNING}{bcolors.BOLD}⏳ Tests not run or interrupted, time budget of {budget:.0f}s exhausted: {not_run_cases}{bcolors.ENDC}'
+        )
     print(
         f'{bcolors.OKCYAN}{bcolors.BOLD}🏆 Points: {total_points:.2f}/{total_max:.2f}{bcolors.ENDC}'
     )
@@ -111,6 +154,14 @@ def print_test_header(test_name, current, total, status):
         color = bcolors.FAIL
         icon = '⛔'
         message = 'Test not run, contact your teacher'
+    elif status == 'out_of_time':
+        color = bcolors.WARNING
+        icon = '⏳'
+        message = 'Test not run, time budget exhausted'
+    elif status == 'interrupted':
+        color = bcolors.WARNING
+        icon = '⏳'
+        message = 'Test interrupted, time budget exhausted'
     else:
         color = bcolors.FAIL
         icon = "❌"
@@ -183,6 +234,85 @@ def load_cases() -> list:
     return cases_list
 
 
+def load_time_budget() -> float:
+    """
+    Loads the global time budget for all test cases from the environment.
+    :return: the budget in seconds, or 0 if the test cases are not limited
+    """
+    try:
+        return max(0.0, float(os.getenv('TIME_BUDGET', '0')))
+    except ValueError:
+        print(f'{bcolors.WARNING}Invalid TIME_BUDGET, running without time budget{bcolors.ENDC}')
+        return 0.0
+
+
+def durations_path() -> str:
+    """
+    Returns the file with the historical durations, specified by FILE_DURATIONS.
+    A relative name is a file in .github/autograding of the checkout, an absolute path can point outside
+    the checkout so the history survives the runner, e.g. a directory kept with actions/cache.
+    """
+    file_durations = os.path.expanduser(os.getenv('FILE_DURATIONS', 'durations.json'))
+    return os.path.join('./.github/autograding', file_durations)
+
+
+def load_durations() -> dict:
+    """
+    Loads the historical durations of the test cases, by function.
+    The file is specified by FILE_DURATIONS and is optional.
+    :return: a dictionary with the duration in seconds of each test function
+    """
+    try:
+        with open(durations_path(), encoding='UTF-8') as file:
+            return json.load(file)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_durations(durations: dict):
+    """Stores the durations of the test cases for the next runs."""
+    path = durations_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='UTF-8') as file:
+            json.dump(durations, file, indent=2)
+    except IOError:
+        pass
+
+
+def is_timeout(output) -> bool:
+    """Checks whether pytest-timeout stopped the test case."""
+    return any('Timeout (>' in line and 'pytest-timeout' in line for line in output)
+
+
+def record_duration(durations: dict, case, duration: float):
+    """Blends the measured duration of a test case into its historical duration."""
+    previous = durations.get(case.function)
+    if previous is not None:
+        duration = (previous + duration) / 2
+    durations[case.function] = round(duration, 3)
+
+
+def estimate_duration(case, durations: dict) -> float:
+    """Estimates the duration of a test case, a case never runs longer than its timeout."""
+    return min(durations.get(case.function, case.timeout), case.timeout)
+
+
+def schedule_cases(cases_list: list, durations: dict) -> list:
+    """
+    Orders the test cases to maximize the points evaluated within the time budget.
+    Cases with the most points per estimated second run first, ties keep the order of the config.
+    :param cases_list: the test cases
+    :param durations: the historical durations of the test cases
+    :return: the test cases in the order they should run
+    """
+    return sorted(
+        cases_list,
+        key=lambda case: case.points / max(estimate_duration(case, durations), 0.01),
+        reverse=True,
+    )
+
+
 def initialize_results():
     """Initialize the results dictionary."""
     return {'category': 'pytest', 'points': 0, 'max': 0, 'feedback': []}
@@ -0,0 +1,282 @@
+""" Finds near-identical submissions using fingerprints of their abstract syntax trees.
+    The trees parsed by run_pylint are reused: run_pylint loads this module as a pylint plugin,
+    its FingerprintChecker fingerprints every module while pylint lints it (also in the parallel workers).
+    Only the files written by the student count, see is_student_file: the conftest.py and the tests
+    are the same in every submission.
+    Every tree is normalized to the sequence of its node types, identifiers and constants are dropped,
+    so renaming variables or changing strings does not change the fingerprints.
+    The sequence is hashed in k-grams and reduced by winnowing (one hash per window).
+    The fingerprints of each submission are stored as json in the directory SIMILARITY_DIR,
+    an inverted index over all stored submissions yields the candidate pairs without comparing
+    every pair of submissions. The similarity of a pair is the Jaccard index of their fingerprints,
+    ignoring the boilerplate fingerprints shared by more than BOILERPLATE_SHARE of the submissions.
+"""
+
+import argparse
+import json
+import os
+import re
+import zlib
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from astroid import nodes
+from pylint.checkers import BaseChecker
+
+from utils import bcolors
+
+K_GRAM = 5
+WINDOW = 4
+BOILERPLATE_SHARE = 0.5  # fingerprints shared by more of the submissions are boilerplate
+MIN_POSTINGS = 2  # a fingerprint shared by two submissions is never boilerplate
+THRESHOLD = 0.6
+TEMPLATE_FILES = re.compile(r'^(conftest|test_.*|.*_test)\.py$')
+
+
+def normalize_tree(tree) -> list:
+    """
+    Return the node types of the tree in pre-order.
+    Operators are kept, names and constants are not.
+    """
+    tokens = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        token = type(node).__name__
+        op = getattr(node, 'op', None)
+        if isinstance(op, str):
+            token += op
+        elif isinstance(node, nodes.Compare):
+            token += ''.join(operator for operator, _ in node.ops)
+        tokens.append(token)
+        stack.extend(reversed(list(node.get_children())))
+    return tokens
+
+
+def winnow(hashes: list, window: int = WINDOW) -> set:
+    """Select the minimal hash of every window"""
+    if len(hashes) <= window:
+        return set(hashes)
+
+    fingerprints = set()
+    for start in range(len(hashes) - window + 1):
+        fingerprints.add(min(hashes[start:start + window]))
+    return fingerprints
+
+
+def fingerprint_tree(tree, k: int = K_GRAM, window: int = WINDOW) -> set:
+    """Compute the winnowed k-gram fingerprints of an astroid tree"""
+    tokens = normalize_tree(tree)
+    hashes = [
+        zlib.crc32(' '.join(tokens[start:start + k]).encode('UTF-8'))
+        for start in range(max(1, len(tokens) - k + 1))
+    ]
+    return winnow(hashes, window)
+
+
+class FingerprintChecker(BaseChecker):
+    """
+    Fingerprints the trees of the modules while pylint checks them
+    """
+
+    name = 'fingerprints'
+    # pylint only runs checkers with an enabled message, this one is never emitted
+    msgs = {
+        'I9901': (
+            'Module fingerprinted',
+            'module-fingerprinted',
+            'Used by the similarity check of the autograder, never emitted.',
+        ),
+    }
+
+    def __init__(self, linter):
+        super().__init__(linter)
+        self.fingerprints = {}  # path -> fingerprints of the module
+
+    def visit_module(self, node: nodes.Module):
+        if node.file:
+            self.fingerprints[os.path.abspath(node.file)] = sorted(fingerprint_tree(node))
+
+    def get_map_data(self):
+        # Called per file in the parallel workers, send every module only once
+        data = self.fingerprints
+        self.fingerprints = {}
+        return data
+
+    def reduce_map_data(self, linter, data: list):
+        for fingerprints in data:
+            self.fingerprints.update(fingerprints)
+
+
+def is_student_file(path: str, ignore_patterns: list = None) -> bool:
+    """
+    Check whether a file was written by the student.
+    :param path: The path of the file
+    :param ignore_patterns: The ignore patterns of the lint configuration
+    :return: False for the conftest.py, the tests and the ignored files
+    """
+    if TEMPLATE_FILES.match(os.path.basename(path)):
+        return False
+    relative_path = os.path.relpath(path)
+    return not any(re.match(pattern, relative_path) for pattern in ignore_patterns or [])
+
+
+def register(linter):
+    """Entry point of the pylint plugin"""
+    linter.register_checker(FingerprintChecker(linter))
+
+
+class SimilarityIndex:
+    """
+    Inverted index from fingerprints to the submissions containing them
+    """
+
+    def __init__(self):
+        self.fingerprints = {}
+        self.postings = defaultdict(set)
+
+    def add(self, submission: str, fingerprints: set):
+        self.fingerprints[submission] = set(fingerprints)
+        for fingerprint in fingerprints:
+            self.postings[fingerprint].add(submission)
+
+    def max_postings(self) -> int:
+        """The number of submissions a fingerprint may be shared by before it is boilerplate"""
+        return max(MIN_POSTINGS, int(BOILERPLATE_SHARE * len(self.fingerprints)))
+
+    def candidate_pairs(self) -> Counter:
+        """Count the shared fingerprints of every pair of submissions that share any"""
+        max_postings = self.max_postings()
+        shared = Counter()
+        for submissions in self.postings.values():
+            if 1 < len(submissions) <= max_postings:
+                for pair in combinations(sorted(submissions), 2):
+                    shared[pair] += 1
+        return shared
+
+    def report(self, threshold: float = THRESHOLD, submission: str = None) -> list:
+        """
+        List the pairs of submissions with a similarity of at least threshold.
+        :param threshold: The minimal similarity
+        :param submission: Only list the pairs containing this submission
+        :return: A list of dicts with the keys submission_a, submission_b, similarity, shared
+        """
+        # The boilerplate fingerprints are not counted as shared, so they are not part of the union either
+        max_postings = self.max_postings()
+        boilerplate = {
+            fingerprint
+            for fingerprint, submissions in self.postings.items()
+            if len(submissions) > max_postings
+        }
+        sizes = {name: len(fingerprints - boilerplate) for name, fingerprints in self.fingerprints.items()}
+
+        pairs = []
+        for (first, second), shared in self.candidate_pairs().items():
+            if submission and submission not in (first, second):
+                continue
+            union = sizes[first] + sizes[second] - shared
+            similarity = round(shared / union, 2) if union else 0.0
+            if similarity >= threshold:
+                pairs.append({
+                    'submission_a': first,
+                    'submission_b': second,
+                    'similarity': similarity,
+                    'shared': shared,
+                })
+        return sorted(pairs, key=lambda pair: pair['similarity'], reverse=True)
+
+    @classmethod
+    def load(cls, directory: str) -> 'SimilarityIndex':
+        """Build the index from the fingerprint files stored in directory"""
+        index = cls()
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.fingerprints.json'):
+                continue
+            try:
+                with open(os.path.join(directory, filename), encoding='UTF-8') as file:
+                    data = json.load(file)
+                index.add(data['submission'], data['fingerprints'])
+            except (IOError, ValueError, KeyError):
+                print(f'{bcolors.WARNING}Skipping invalid fingerprint file {filename}{bcolors.ENDC}')
+        return index
+
+
+def run_similarity(test_result_collection: list) -> list:
+    """
+    Store the fingerprints collected by run_pylint and report the similar submissions.
+    Does nothing unless SIMILARITY_DIR is set.
+    :param test_result_collection: The results of the runners, the fingerprints are in the linting results
+    :return: The similar pairs containing this submission
+    """
+    directory = os.getenv('SIMILARITY_DIR')
+    if not directory:
+        return []
+
+    fingerprints = set()
+    for test_result in test_result_collection:
+        for module_fingerprints in test_result.get('fingerprints', {}).values():
+            fingerprints.update(module_fingerprints)
+    if not fingerprints:
+        print(f'{bcolors.WARNING}No fingerprints collected, skipping the similarity check{bcolors.ENDC}')
+        return []
+
+    submission = os.environ['REPO']
+    store_fingerprints(directory, submission, fingerprints)
+    pairs = SimilarityIndex.load(directory).report(submission=submission)
+    print_to_console(pairs)
+    return pairs
+
+
+def store_fingerprints(directory: str, submission: str, fingerprints: set):
+    """Write the fingerprints of a submission to the directory"""
+    os.makedirs(directory, exist_ok=True)
+    filename = submission.replace('/', '__') + '.fingerprints.json'
+    with open(os.path.join(directory, filename), 'w', encoding='UTF-8') as file:
+        json.dump(
+            {
+                'submission': submission,
+                'commit': os.getenv('GITHUB_SHA', ''),
+                'fingerprints': sorted(fingerprints),
+            },
+            file,
+        )
+
+
+def print_to_console(pairs: list):
+    """
+    Print the similar pairs to the console
+    :param pairs: The pairs returned by SimilarityIndex.report
+    """
+    print('\n\n')
+    print(
+        f'{bcolors.HEADER}################################################################################{bcolors.ENDC}'
+    )
+    print(f'{bcolors.BOLD}{bcolors.HEADER}Similar Submissions{bcolors.ENDC}')
+    print(
+        f'{bcolors.HEADER}################################################################################{bcolors.ENDC}'
+    )
+    if not pairs:
+        print(f'{bcolors.OKGREEN}✅ No similar submissions found{bcolors.ENDC}')
+    for pair in pairs:
+        print(
+            f'{bcolors.WARNING}{pair["similarity"] * 100:.0f}% {pair["submission_a"]} <-> {pair["submission_b"]}{bcolors.ENDC}'
+        )
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    # loading variables from .env file
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Report similar submissions')
+    parser.add_argument('directory', nargs='?', default=os.getenv('SIMILARITY_DIR'))
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+    if not args.directory:
+        parser.error('directory or SIMILARITY_DIR is required')
+
+    report = SimilarityIndex.load(args.directory).report(args.threshold)
+    print_to_console(report)
+    with open(os.path.join(args.directory, 'similarity.json'), 'w', encoding='UTF-8') as report_file:
+        json.dump(report, report_file, indent=2)
@@ -2,6 +2,8 @@
 This file contains utility functions and classes that are used in the main script.
 """
 
+import os
+
 
 class bcolors:
     """Class to define colors for console output"""
@@ -15,3 +17,16 @@ class bcolors:
     ENDC = '\033[0m'
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
+
+
+def github_api_url() -> str:
+    """Base URL of the GitHub REST API, overridable for local stand-ins"""
+    return os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+
+def github_headers() -> dict:
+    """Authorization headers for the GitHub REST API"""
+    return {
+        'Authorization': f'token {os.getenv("GH_TOKEN")}',  # GitHub token from env variables
+        'Accept': 'application/vnd.github.v3+json'
+    }